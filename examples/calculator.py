@@ -11,46 +11,56 @@ from pyparsers import *
 # Gives a simple example of how to implement a calculator.
 # Note: Reliance on regexes is maybe the most cryptic bit. Is that an issue ?
 #===============================================================================
+NUMBER = regex(r"-?\s*\d+"      , int)  \
+       | regex(r'-?\s*\d+\.\d+' , float)
+
 class Calculator:
 
+    def __init__(self):
+        """
+        Builds the grammar once and for all. The rules refer to each other through
+        `parser(self.rule)` which only resolves the referenced rule when it is called.
+        Alternatives sharing a common prefix are memoized (packrat) so that the prefix
+        is parsed only once per position.
+        """
+        number= parser(self.number)
+        power = parser(self.power)
+        arith = parser(self.arith)
+        multi = parser(self.multiplication)
+        term  = parser(self.term)
+
+        self._power = sequence(number, "^", power, action=lambda a, b, c: a**c) \
+                    | number
+
+        atom  = packrat( power \
+                       | sequence("(", arith, ")", action=lambda a, b, c: b))
+
+        self._multiplication = packrat(
+                      sequence(atom, "*", multi, action=lambda a, b, c: a*c) \
+                    | sequence(atom, "/", multi, action=lambda a, b, c: a/c) \
+                    | sequence(atom, "%", multi, action=lambda a, b, c: a%c) \
+                    | atom)
+
+        self._term  = sequence(multi, "+", term, action=lambda a, b, c: a+c) \
+                    | sequence(multi, "-", term, action=lambda a, b, c: a-c) \
+                    | multi
+
     def tokenizer(self):
         tok = Tokenizer()
         tok.punctuation(r"\+", r"-", r"\*", r"/", r"\^", r"%", r"\(", r"\)")
         return tok
 
     def number(self, tokens, position=0):
-        expr = regex(r"-?\s*\d+"      , int)  \
-            |  regex(r'-?\s*\d+\.\d+' , float)
-        return expr(tokens, position)
+        return NUMBER(tokens, position)
 
     def power(self, tokens, position=0):
-        number = parser(self.number)
-        power  = parser(self.power)
-        expr   = sequence(number, "^", power, action=lambda a, b, c: a**c) \
-               | number
-        return expr(tokens, position)
+        return self._power(tokens, position)
 
     def multiplication(self, tokens, position=0):
-        power = parser(self.power)
-        arith = parser(self.arith)
-        multi = parser(self.multiplication)
-
-        atom  = power \
-              | sequence("(", arith, ")", action=lambda a, b, c: b)
-
-        expr  = sequence(atom, "*", multi, action=lambda a, b, c: a*c) \
-              | sequence(atom, "/", multi, action=lambda a, b, c: a/c) \
-              | sequence(atom, "%", multi, action=lambda a, b, c: a%c) \
-              | atom
-        return expr(tokens, position)
+        return self._multiplication(tokens, position)
 
     def term(self, tokens, position=0):
-        factor = parser(self.multiplication)
-        term   = parser(self.term)
-        expr   = sequence(factor, "+", term, action=lambda a, b, c: a+c) \
-               | sequence(factor, "-", term, action=lambda a, b, c: a-c) \
-               | factor
-        return expr(tokens, position)
+        return self._term(tokens, position)
 
     def arith(self, tokens, position=0):
         return self.term(tokens, position)
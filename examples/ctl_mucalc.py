@@ -15,6 +15,31 @@ class CTL:
     """A very simple CTL interpreter"""
     def __init__(self, actions):
         self._act = Actions()
+        
+        # The grammar is built once and for all. `phi` refers back to the `state_formula`
+        # method, which is what lets the rule be recursive.
+        phi    = parser(self.state_formula)
+        atomic = parser(self.atomic_prop)                                           \
+               | sequence("(", phi, ")",                action=self._act.surround)
+        
+        # because there is no left recursion, use first and follow sets: the first token
+        # tells which alternative to apply
+        tailrec= dispatch({
+                   "!" : sequence("!", phi,                     action=self._act.negation),
+                   "EX": sequence("EX", phi,                    action=self._act.ex),
+                   "EG": sequence("EG", phi,                    action=self._act.eg),
+                   "E" : sequence("E", "[", phi, "U", phi, "]", action=self._act.eu),
+                   "AX": sequence("AX", phi,                    action=self._act.ax),
+                   "AG": sequence("AG", phi,                    action=self._act.ag),
+                   "A" : sequence("A", "[", phi, "U", phi, "]", action=self._act.au)
+                 }, default=atomic)
+        # the alternatives below all start with `tailrec`: parse it only once per position
+        tailrec= packrat(tailrec)
+        
+        self._atomic_prop  = regex("[a-z]+")
+        self._state_formula= sequence(tailrec, "|", phi,             action=self._act._or)       \
+                           | sequence(tailrec, "&", phi,             action=self._act._and)      \
+                           | tailrec
     
     def tokenizer(self):
         """The tokenizer: recognizes a few special chars"""
@@ -24,30 +49,11 @@ class CTL:
     
     def atomic_prop(self, tokens, position=0):
         """A parser that recognises a simple atomic proposition identifier"""
-        ident = regex("[a-z]+")
-        return ident(tokens, position)
+        return self._atomic_prop(tokens, position)
     
     def state_formula(self, tokens, position=0):
         """Parses a CTL formula and produces the equivalent mu calculus expression"""
-        phi    = parser(self.state_formula)
-        atomic = parser(self.atomic_prop)                                           \
-               | sequence("(", phi, ")",                action=self._act.surround)
-        
-        # because there is no left recursion, use first and follow sets
-        tailrec= sequence("!", phi,                     action=self._act.negation)  \
-               | sequence("EX", phi,                    action=self._act.ex)        \
-               | sequence("EG", phi,                    action=self._act.eg)        \
-               | sequence("E", "[", phi, "U", phi, "]", action=self._act.eu)        \
-               | sequence("AX", phi,                    action=self._act.ax)        \
-               | sequence("AG", phi,                    action=self._act.ag)        \
-               | sequence("A", "[", phi, "U", phi, "]", action=self._act.au)        \
-               | atomic
-               
-        leftrec= sequence(tailrec, "|", phi,             action=self._act._or)       \
-               | sequence(tailrec, "&", phi,             action=self._act._and)      \
-               | tailrec
-
-        return leftrec(tokens, position)
+        return self._state_formula(tokens, position)
     
     def interpret(self, text):
         return parse_all(text, self.state_formula, self.tokenizer())
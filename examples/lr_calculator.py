@@ -31,6 +31,27 @@ from pyparsers import *
 # Note: Reliance on regexes is maybe the most cryptic bit. Is that an issue ?
 #===============================================================================
 class LRCalculator:
+    def __init__(self):
+        """
+        Builds the grammar once and for all: the rule methods below only delegate to the
+        parsers built here (which refer back to the rule methods to support recursion).
+        """
+        mul_ = parser(self.product)
+        add_ = parser(self.addition)
+
+        self._number  = regex("-?[0-9]+(\.[0-9]+)?", float)
+
+        self._atom    = sequence("(", self.expression, ")", action=lambda _l,e,_r: e) \
+                      | parser(self.number)
+
+        self._product = sequence(mul_, "*", mul_, action=lambda x,_,y: x*y) \
+                      | sequence(mul_, "/", mul_, action=lambda x,_,y: x/y) \
+                      | parser(self.atom)
+
+        self._addition= sequence(add_ , "+", add_, action=lambda x,_,y: x+y) \
+                      | sequence(add_ , "-", add_, action=lambda x,_,y: x-y) \
+                      | parser(self.product)
+
     def tokenizer(self):
         tok = Tokenizer()
         tok.punctuation(r"\+", r"-", r"\*", r"/", r"\^", r"%", r"\(", r"\)")
@@ -38,29 +59,19 @@ class LRCalculator:
     
     @memoize
     def number(self, tokens, position=0): 
-        return regex("-?[0-9]+(\.[0-9]+)?", float)(tokens, position)
+        return self._number(tokens, position)
     
     @memoize
     def atom(self, tokens, position=0):
-        expr = sequence("(", self.expression, ")", action=lambda _l,e,_r: e) \
-             | parser(self.number)
-        return expr(tokens, position)
+        return self._atom(tokens, position)
     
     @leftrec
     def product(self, tokens, position=0):
-        mul_ = parser(self.product)
-        expr = sequence(mul_, "*", mul_, action=lambda x,_,y: x*y) \
-             | sequence(mul_, "/", mul_, action=lambda x,_,y: x/y) \
-             | parser(self.atom)
-        return expr(tokens, position)
+        return self._product(tokens, position)
     
     @leftrec
     def addition(self, tokens, position=0):
-        add_ = parser(self.addition)
-        expr = sequence(add_ , "+", add_, action=lambda x,_,y: x+y) \
-             | sequence(add_ , "-", add_, action=lambda x,_,y: x-y) \
-             | parser(self.product)
-        return expr(tokens, position)
+        return self._addition(tokens, position)
     
     def expression(self, tokens, position=0):
         return self.addition(tokens, position)
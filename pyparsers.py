@@ -13,55 +13,68 @@ an other parsers engine.
 
 Author: X. Gillard
 '''
+import functools
 import re
+import sys
 from abc import abstractmethod
 
 #===============================================================================
 # Tokenization
 #===============================================================================
-class TokenStream:
+class TokenStream(tuple):
     """
-    A stream of token implemented as a thin wrapper around a list of element.
+    A stream of token implemented as an (immutable) tuple of tokens. Being a tuple, accessing
+    a token of the stream or its length does not involve any python level method call.
+
+    Streams are compared and hashed by identity: two streams are only equal when they are
+    the very same object. This is what the memoizing decorators need to tell two parses
+    apart, and it spares them the hashing of every token of the stream at each lookup.
 
     .. Note::
         Although you might want to implement an other (ie. more memory efficient)
         TokenStream, you should make sure an implementation of the __hash__
-        method as well as some of the methods from the container protocol are
-        available. This way, you should be able to make sure all the parsers defined
+        method as well as some of the methods from the container protocol
+        (__getitem__ and __len__ are mandatory, __contains__ and __iter__ are facultative)
+        are available. This way, you should be able to make sure all the parsers defined
         in the library (or the ones you define) are interoperatable with your new
         token stream implementation.
     """
-    def __init__(self, tokenizer, text):
-        self._tokens = tokenizer.tokenize(text)
-
-    def __getitem__(self, pos):
-        """
-        .. warning:: -- IMPLEMENTATION IS MANDATORY --
-        :returns: the pos-th token in the stream
-        """
-        return self._tokens[pos]
+    def __new__(cls, tokenizer, text):
+        return super().__new__(cls, tokenizer.tokenize(text))
 
-    def __len__(self):
-        """
-        .. warning:: -- IMPLEMENTATION IS MANDATORY --
-        :returns: the length of the stream
-        """
-        return len(self._tokens)
+    def __reduce__(self):
+        """Lets streams be copied and pickled: a stream is rebuilt from its tokens"""
+        return (_rebuild_stream, (type(self), tuple(self)))
 
     def __contains__(self, token):
         """
-        .. warning:: -- IMPLEMENTATION IS FACULTATIVE --
-        :returns: True iff the token is part of the stream
+        Tells whether the token appears in the stream. The set of the tokens of the stream
+        is only built the first time this question is asked, it answers all the later ones.
         """
-        return token in self._tokens
+        try:
+            vocabulary = self._vocabulary
+        except AttributeError:
+            vocabulary = self._vocabulary = frozenset(self)
+        try:
+            return token in vocabulary
+        except TypeError:
+            # an unhashable value can still be equal to one of the tokens
+            return tuple.__contains__(self, token)
+
+    def __eq__(self, other):
+        """A stream is only equal to itself (even when compared to a tuple of the same tokens)"""
+        return self is other
+
+    def __ne__(self, other):
+        """A stream differs from anything that is not itself"""
+        return self is not other
+
+    __hash__ = object.__hash__
 
-    def __iter__(self):
-        """
-        .. warning:: -- IMPLEMENTATION IS FACULTATIVE --
-        Iterates over the stream of tokens
-        """
-        return iter( self._tokens )
 
+def _rebuild_stream(cls, tokens):
+    """Recreates a stream of the given class holding the given (already tokenized) tokens"""
+    return tuple.__new__(cls, tokens)
 
 class Tokenizer:
     """
@@ -71,54 +84,38 @@ class Tokenizer:
     def __init__(self, whitespace = "\s", punctuation="$^"):
         self._whitespace = whitespace
         self._punctuation= punctuation # by default, no punctuation is ever matched
+        self._compile()
 
     def whitespace(self, *expr):
         """What is considered blank text"""
         self._whitespace = "|".join(expr)
+        self._compile()
         return self
 
     def punctuation(self, *ops):
         """The 'punctuation' of the language (may connect two other tokens)"""
         self._punctuation = "|".join(ops)
+        self._compile()
         return self
 
+    def _compile(self):
+        """
+        Compiles the pattern used to scan the text. Each match of that pattern is either a
+        whitespace, a punctuation or the (non empty) word that lies in between.
+        """
+        self._scanner = re.compile(
+            "(?P<ws>{0})|(?P<punct>{1})|(?P<word>.+?(?=(?:{0})|(?:{1})|\\Z))"\
+                .format(self._whitespace, self._punctuation),
+            re.DOTALL)
+
     def tokenize(self, text):
         """
         Tokenizes the given text to a stream (list) of tokens where punctuation is taken into account
         """
-        # split and drop whitspaces
-        tokens = re.split(self._whitespace, text)
-        # separate punctuation from the rest
-        tokens = [ self._partition(self._punctuation, token) for token in tokens ]
-        # flatten
-        tokens = [ x for a in tokens for x in a ]
-        return tokens
-
-    def _partition(self, punct, text):
-        """
-        Partitions a given string in a disjoint set of substrings where some substrings match the given
-        punctuation pattern (`punct`) and the rest doesn't
-        """
-        rest   = text
-        result = []
-
-        while rest:
-            match = re.search(punct, rest)
-            if match:
-                # if there was something before, add it
-                if match.start() != 0:
-                    result.append( rest[0: match.start()] )
-
-                # add the match that was found
-                result.append( rest[match.start():match.end()] )
-                # consider only what's left
-                rest    = rest[match.end():]
-            else:
-                # add the remainder to the result
-                result.append( rest )
-                rest    = None
-
-        return result
+        # scan the text once, dropping whitespaces (and empty punctuation matches). Interning the
+        # tokens makes them cheaper to compare with the parsers literals
+        return [ sys.intern(match.group()) for match in self._scanner.finditer(text)
+                                           if match.lastgroup != "ws" and match.end() > match.start() ]
 
 
 #===============================================================================
@@ -128,6 +125,8 @@ class ParseResult:
     """
     This is the abstract class that describes the kind of objects to be returned by the parser apis.
     """
+    __slots__ = ("_pos",)
+
     def __init__(self, pos):
         """
         Creates a new instance remembering the position (:param pos:) in the stream of tokens up to
@@ -166,6 +165,8 @@ class ParseResult:
 
 class Success(ParseResult):
     """A parse result encapsulating the case where a subsequence of tokens has correctly been parsed"""
+    __slots__ = ("_val",)
+
     def __init__(self, pos, value):
         super().__init__(pos)
         self._val = value
@@ -220,11 +221,15 @@ class Success(ParseResult):
 
 class Failure(ParseResult):
     """A parse result encapsulating the case where the stream of token couldn't be parsed"""
+    __slots__ = ("_reason",)
+
     def __init__(self, pos, reason):
         super().__init__(pos)
         self._reason = reason
 
     def reason(self):
+        if type(self._reason) is _LazyReason:
+            self._reason = str(self._reason)
         return self._reason
 
     def success(self):
@@ -272,6 +277,34 @@ class Failure(ParseResult):
         return isinstance(other, Failure)
 
 
+class _LazyReason:
+    """
+    The reason of a failure whose message is only formatted when somebody asks for it.
+    Most of the failures happen while backtracking and are thrown away without ever being
+    looked at: there is no point in formatting their message.
+    """
+    __slots__ = ("_template", "_args")
+
+    def __init__(self, template, *args):
+        self._template = template
+        self._args     = args
+
+    def __str__(self):
+        return self._template.format(*self._args)
+
+
+def _triple(result):
+    """
+    :return: the given parse result as a (success, position, value) triple where value is the
+             reason of the failure when success is False. This is the lightweight form of the
+             parse results that the parsers of this module exchange with each other.
+    """
+    if result.success():
+        return (True, result.position(), result.value())
+    else:
+        return (False, result.position(), result.reason())
+
+
 #===============================================================================
 # Utility actions
 #===============================================================================
@@ -279,6 +312,10 @@ def identity(x):
     """A function that does nothing (the default parse action)"""
     return x
 
+def as_tuple(*x):
+    """A function that packs its arguments in a tuple (the default action of `sequence`)"""
+    return x
+
 #===============================================================================
 # The real parser thing !
 #===============================================================================
@@ -289,16 +326,35 @@ class Parser:
     """
     def __init__(self, fn, action=identity):
         """Creates a new object and remembers the function being decorated"""
-        self._fn  = fn if not isinstance(fn, str) else text(fn)
+        fn        = fn if not isinstance(fn, str) else text(fn)
+        self._fn  = fn if not isinstance(fn, Parser) else fn._parse
         self._act = action
 
     def __call__(self, tokens, position=0):
         """Executes the underlying function"""
+        success, position, value = self._parse(tokens, position)
+        return Success(position, value) if success else Failure(position, value)
+
+    def _parse(self, tokens, position=0):
+        """
+        Executes the underlying function and returns its result as a (success, position, value)
+        triple (see `_triple`). This is how the parsers of this module call each other: it spares
+        the allocation of a full blown `ParseResult` at each step of the parse.
+
+        .. Note::
+            The underlying function may either return such a triple or a `ParseResult`
+            (ie. when it is a function written by the user of the library).
+        """
         if position >= len(tokens):
-            return Failure(position, "Reached end of token stream")
-        return self._fn(tokens, position).transform(self._act)
+            return (False, position, "Reached end of token stream")
+        result = self._fn(tokens, position)
+        if type(result) is not tuple:
+            result = _triple(result)
+        if result[0] and self._act is not identity:
+            return (True, result[1], self._act(result[2]))
+        return result
 
-    def then(self, other, action=lambda x,y: (x,y)):
+    def then(self, other, action=as_tuple):
         """
         Combines this parser with an other one to return a new parser that recognizes this content followed
         by the content recognized by the other parser
@@ -310,14 +366,16 @@ class Parser:
         Combines this parser with an other one to return a new parser that recognizes either this content
         or the one from the other
         """
-        other = other if isinstance(other, Parser) else Parser(other)
+        other = _as_parser(other)
+        return ChoiceParser(self._alternatives() + other._alternatives(), action)
 
-        def choice(tokens, position=0):
-            """Internal function to recognize either one or the other content"""
-            me  = self(tokens, position)
-            return me if me.success() else other(tokens, position)
-        # The parser result
-        return Parser(choice, action)
+    def _alternatives(self):
+        """
+        :return: the list of alternatives this parser stands for when it is combined with an
+                 other one using `alt` (by default, that's only the parser itself). Each of
+                 them comes with the tuple of the choices it was flattened from.
+        """
+        return [(self, ())]
 
     def __add__(self, other):
         """Allows the sequential combination of parsers in a symbolic fashion"""
@@ -350,32 +408,193 @@ class VariadicActionParser(Parser):
         Creates a new instance and makes sure the action is called with args
         instead of a list.
         """
-        super().__init__(rule, lambda x: action(*x))
+        super().__init__(rule, self._variadic(action))
 
     def action(self, action):
         """
         Replaces the internal action and makes sure the action is called with args
         instead of a list.
         """
-        #self._act = lambda x: action(*x)
-        super().action(lambda x: action(*x))
+        super().action(self._variadic(action))
+
+    @staticmethod
+    def _variadic(action):
+        """Turns `action` into a function receiving the list of values as a single param"""
+        # tuple does exactly what as_tuple would do with the broken down list
+        if action is as_tuple:
+            return tuple
+        return lambda x: action(*x)
+
+
+class TextParser(Parser):
+    """
+    The parser generated by `text`: it recognizes one given keyword (the `literal`).
+    Knowing that keyword lets a choice between such parsers find the one to apply
+    with a dictionary lookup instead of trying them all.
+    """
+    def __init__(self, fn, literal, action=identity):
+        super().__init__(fn, action)
+        self.literal = literal
+
+class RegexParser(Parser):
+    """
+    The parser generated by `regex`: it recognizes one token matching a given pattern.
+    Knowing the `matches` function of that pattern lets `repeat` check the tokens itself.
+    """
+    def __init__(self, fn, matches, action=identity):
+        super().__init__(fn, action)
+        self.matches = matches
+
+class ChoiceParser(Parser):
+    """
+    A parser that tries each of its alternatives in turn and yields the result of the
+    first one that succeeds (or the failure of the last one when none of them does).
+
+    This is what `alt` and the `|` operator generate. Chaining these operators extends the
+    list of alternatives rather than nesting one choice in an other. This way, a rule such as
+    `a | b | c | d` tries its alternatives in one single loop.
+
+    .. Note::
+        Each alternative comes with the (innermost first) choices it was flattened from.
+        Their actions are applied when it succeeds, so an action given to a nested choice
+        after it was combined still transforms the result, just like it would if the
+        choices had been nested.
+    """
+    def __init__(self, alternatives, action=identity):
+        """
+        Creates a new instance trying the given alternatives (in that order). Each of them
+        is either a parser or an (alternative, nested choices) pair as made by `_alternatives`.
+        """
+        if not alternatives:
+            raise ValueError("A choice needs at least one alternative")
+        super().__init__(self._choose, action)
+        self._alts = [ a if type(a) is tuple else (a, ()) for a in alternatives ]
+        # when all alternatives are keywords, the current token tells which one applies
+        if all(type(a) is TextParser for a, _ in self._alts):
+            keywords = {}
+            try:
+                for alternative in self._alts:
+                    keywords.setdefault(alternative[0].literal, alternative)
+            except TypeError:
+                # an unhashable keyword cannot be looked up: the alternatives are tried in turn
+                return
+            self._keywords = keywords
+            self._fn       = self._lookup
+
+    @staticmethod
+    def _nested_actions(result, owners):
+        """Applies the actions of the nested choices the successful alternative came from"""
+        for owner in owners:
+            if owner._act is not identity:
+                result = (True, result[1], owner._act(result[2]))
+        return result
+
+    def _choose(self, tokens, position=0):
+        """Internal function to recognize the content of the first matching alternative"""
+        for alternative, owners in self._alts:
+            result = alternative._parse(tokens, position)
+            if result[0]:
+                return self._nested_actions(result, owners) if owners else result
+        return result
+
+    def _lookup(self, tokens, position=0):
+        """Internal function to recognize the keyword alternative matching the current token"""
+        try:
+            alternative, owners = self._keywords.get(tokens[position], self._alts[-1])
+        except TypeError:
+            # an unhashable token can still be equal to one of the keywords
+            return self._choose(tokens, position)
+        result = alternative._parse(tokens, position)
+        # when none of them matches, the outcome is the failure of the last one
+        return self._nested_actions(result, owners) if owners and result[0] else result
+
+    def _alternatives(self):
+        """
+        A choice can only be flattened in an other one when it doesn't transform its result.
+        """
+        if self._act is not identity:
+            return [(self, ())]
+        return [ (alternative, owners + (self,)) for alternative, owners in self._alts ]
+
+
+class PackratParser(Parser):
+    """
+    A parser implementation that remembers the result it has produced at each position
+    of the token stream it is applied to. Hence, when the same rule is retried at the same
+    position (ie. when backtracking through alternatives), the cached result is returned
+    instead of parsing the very same tokens over and over again (packrat parsing).
+
+    The memo is bound to the token stream being parsed: it is discarded as soon as the
+    parser is applied to an other stream (ie. upon each new call to `parse_all`). It is
+    a table holding one slot per position of the stream.
+
+    .. Note::
+        The rule being memoized must not take part in a left recursion. Use the `leftrec`
+        decorator for that purpose.
+
+    .. Note::
+        Streams are told apart by identity only: the token stream must not be mutated
+        between two parses (a `TokenStream` never is). Reparsing a modified list would
+        yield the results memoized for its former content.
+    """
+    def __init__(self, fn, action=identity):
+        super().__init__(fn, action)
+        # the stream being parsed and its memo: they are always replaced together, at once,
+        # so that concurrent parses never pair a stream with the memo of an other one
+        self._state = (None, [])
+
+    def then(self, other, action=as_tuple):
+        """
+        Combines this parser with an other one (see `Parser.then`). The combination goes
+        through this very parser, hence through its memoized results.
+        """
+        return sequence(self, other, action=action)
+
+    def _parse(self, tokens, position=0):
+        """Executes the underlying function unless its result is already known"""
+        state = self._state
+        if state[0] is not tokens:
+            state = self._state = (tokens, [None] * len(tokens))
+        memo = state[1]
+        try:
+            result = memo[position]
+        except IndexError:
+            # past the end of the stream, there is nothing worth remembering
+            return super()._parse(tokens, position)
+        if result is None:
+            result = memo[position] = super()._parse(tokens, position)
+        return result
+
+    def action(self, action):
+        """
+        Updates the internal action of the parser and forgets the (no longer valid)
+        memoized results.
+        """
+        super().action(action)
+        self._state = (None, [])
 
 
 #===============================================================================
 # Standard parsers (useful stuffs you might have done yourself)
 #===============================================================================
+def _intern(value):
+    """Interns the given value when it is a plain string (others are returned as they are)"""
+    return sys.intern(value) if type(value) is str else value
+
 def text(text, action=identity):
     """
     Generates a parser that recognizes the given text (and only that)
     :param text: the text being recognized
     :param action: the action applied to the parsed token
     """
+    text = _intern(text)
+
     def do_parse(tokens, position=0):
         if tokens[position] == text :
-            return Success(position + 1, text)
+            return (True, position + 1, text)
         else:
-            return Failure(position, "Expected {} instead of {}".format(text, tokens[position]))
-    return Parser(do_parse, action)
+            return (False, position, _LazyReason("Expected {} instead of {}", text, tokens[position]))
+    return TextParser(do_parse, text, action)
 
 def one_of(*enumerated, action=identity):
     """
@@ -383,11 +602,24 @@ def one_of(*enumerated, action=identity):
     :param enumerated: the list of the values recognized by this parser.
     :param action: the action applied to the parsed token
     """
+    try:
+        allowed = frozenset(_intern(e) for e in enumerated)
+    except TypeError:
+        # unhashable values can only be compared one by one
+        allowed = enumerated
+    reason  = "Expecting one of the following tokens "+str(enumerated)
+
     def do_parse(tokens, position=0):
-        if tokens[position] in enumerated:
-            return Success(position+1, tokens[position])
+        token = tokens[position]
+        try:
+            found = token in allowed
+        except TypeError:
+            # an unhashable token can still be equal to one of the values
+            found = token in enumerated
+        if found:
+            return (True, position+1, token)
         else:
-            return Failure(position, "Expecting one of the following tokens "+str(enumerated))
+            return (False, position, reason)
     return Parser(do_parse, action)
 
 def regex(pattern, action=identity):
@@ -396,12 +628,15 @@ def regex(pattern, action=identity):
     :param pattern: pattern recognized by this parser.
     :param action: the action applied to the parsed result
     """
+    compiled = re.compile(r"\A(?:"+pattern+r")\Z")
+    reason   = "Expecting a token matching "+pattern
+
     def do_parse(tokens, position=0):
-        results = re.match("^"+pattern+"$", tokens[position])
-        return Success(1+position, tokens[position]) if results else Failure(position, "Expecting a token matching "+pattern)
-    return Parser(do_parse, action)
+        results = compiled.match(tokens[position])
+        return (True, 1+position, tokens[position]) if results else (False, position, reason)
+    return RegexParser(do_parse, compiled.match, action)
 
-def sequence(*parsers, action=lambda *x: x):
+def sequence(*parsers, action=as_tuple):
     """
     Generates a composite parser for a sequence of tokens.
 
@@ -411,49 +646,159 @@ def sequence(*parsers, action=lambda *x: x):
     :return: a parse result containing action( *( *parsers.value() ) ).
            (In case the result is a failure, action is obviously not applied)
     """
+    literals= tuple( _intern(p) for p in parsers if isinstance(p, str) )
+    parsers = tuple( _as_parser(p) for p in parsers )
+    length  = len(parsers)
+
     def do_parse(tokens, position=0):
-        output = []
-        for p in parsers:
+        output = [None] * length
+        for i in range(length):
             # try to parse
-            current= parser(p) if not isinstance(p, Parser) else p
-            result = current(tokens, position)
+            success, position, value = parsers[i]._parse(tokens, position)
             # if its a failure, stop parsing
-            if not result.success():
-                return result
+            if not success:
+                return (False, position, value)
             # else update the result and the current position.
-            output.append(result.value())
-            position = result.position()
-        return Success(position, output)
+            output[i] = value
+        return (True, position, output)
+
+    # A sequence of keywords can be recognized in one go (the general case above still
+    # takes care of telling what went wrong when it is not recognized)
+    if length and len(literals) == length:
+        first = literals[0]
+
+        def match_literals(tokens, position=0):
+            # most of the misses happen on the very first token
+            token = tokens[position]
+            if not token == first:
+                return (False, position, _LazyReason("Expected {} instead of {}", first, token))
+            try:
+                window = tuple(tokens[position:position+length])
+            except TypeError:
+                # a token stream only has to be indexable by position, not sliceable
+                return do_parse(tokens, position)
+            if window == literals:
+                return (True, position+length, list(literals))
+            # tell what went wrong just like the `text` parser of the first mismatch would
+            for i, (token, literal) in enumerate(zip(window, literals)):
+                if not token == literal:
+                    return (False, position+i, _LazyReason("Expected {} instead of {}", literal, token))
+            # all the remaining tokens match, but there are not enough of them
+            return (False, position+len(window), "Reached end of token stream")
+        return VariadicActionParser(match_literals, action)
+
     return VariadicActionParser(do_parse, action)
 
-def repeat(repeated, min_occurs=0, max_occurs=float("inf"), action=identity):
+def dispatch(mapping, default=None, action=identity):
+    """
+    Generates a parser that picks the rule to apply by looking at the current token only.
+    When each alternative of a rule starts with its own keyword, this is a faster equivalent
+    of chaining them with `|`: the right alternative is found with one dictionary lookup
+    instead of trying all of them in turn.
+
+    .. Example::
+        dispatch({ "EX": sequence("EX", phi), "AX": sequence("AX", phi) }, default=atom)
+
+    :param mapping: a dictionary mapping a token to the rule to apply when the current token
+           is that one (the rule is applied at the current position, hence it must recognize
+           the token itself)
+    :param default: the rule to apply when the current token has no entry in the mapping
+           (the parse fails in that case if no default is given)
+    :param action: the action to be applied on the result
+    """
+    rules   = { _intern(token): _as_parser(rule) for token, rule in mapping.items() }
+    default = _as_parser(default) if default is not None else None
+    reason  = "Expecting one of the following tokens "+str(tuple(mapping))
+
+    def do_parse(tokens, position=0):
+        try:
+            rule = rules.get(tokens[position], default)
+        except TypeError:
+            # an unhashable token has no entry in the mapping
+            rule = default
+        if rule is None:
+            return (False, position, reason)
+        return rule._parse(tokens, position)
+    return Parser(do_parse, action)
+
+def repeat(repeated, min_occurs=0, max_occurs=None, action=identity):
     """
     Generates a parser for a rule that can be repeated.
 
     :param repeated: the rule that can happen many times
+    :param min_occurs: the minimum number of times `repeated` must be recognized
+    :param max_occurs: the maximum number of times `repeated` may be recognized (None means unbounded)
     :param action: the function that receives the *list* of inputs as param and treats them all.
     :return: a parse result containing the processed output of the many results of `repeated`
     """
-    repeated = parser(repeated) if not isinstance(repeated, Parser) else repeated
+    literal  = _intern(repeated) if isinstance(repeated, str) else None
+    repeated = _as_parser(repeated)
 
     def do_parse(tokens, position=0):
         results = []
-        current = repeated(tokens, position)
-        while current.success():
-            position = current.position()
-            results.append(current.value())
-
-            current = repeated(tokens, position)
-
-        res_len = len(results)
-        if res_len < min_occurs :
-            return Failure(position, "{} occurred only {} times (minimum: {})"\
-                                                    .format(repeated, res_len, min_occurs))
-        elif res_len > max_occurs:
-            return Failure(position, "{} occurred {} times (maximum: {})"\
-                                                    .format(repeated, res_len, max_occurs))
+        success, reached, value = repeated._parse(tokens, position)
+        while success:
+            position = reached
+            results.append(value)
+            # no need to look any further once we know there are too many occurrences
+            if max_occurs is not None and len(results) > max_occurs:
+                return (False, position, _LazyReason("{} occurred more than {} times",
+                                                                     repeated, max_occurs))
+
+            success, reached, value = repeated._parse(tokens, position)
+
+        # the (common) min_occurs == 0 case cannot fail
+        if min_occurs and len(results) < min_occurs :
+            return (False, position, _LazyReason("{} occurred only {} times (minimum: {})",
+                                                                 repeated, len(results), min_occurs))
         else:
-            return Success(position, results)
+            return (True, position, results)
+
+    # When each occurrence is a single token, the tokens can be checked directly
+    def end_of_scan(tokens, start):
+        """The position where the scan must stop: one more occurrence than allowed is enough to fail"""
+        if max_occurs is None:
+            return len(tokens)
+        return min(len(tokens), start + max_occurs + 1)
+
+    def outcome(start, position, results):
+        """Accepts or rejects the `position - start` occurrences that were found"""
+        count = position - start
+        if max_occurs is not None and count > max_occurs:
+            return (False, position, _LazyReason("{} occurred more than {} times",
+                                                                 repeated, max_occurs))
+        if min_occurs and count < min_occurs:
+            return (False, position, _LazyReason("{} occurred only {} times (minimum: {})",
+                                                                 repeated, count, min_occurs))
+        return (True, position, results)
+
+    if literal is not None:
+        def repeat_literal(tokens, position=0):
+            start = position
+            end   = end_of_scan(tokens, start)
+            while position < end and tokens[position] == literal:
+                position += 1
+            return outcome(start, position, [literal] * (position - start))
+        return Parser(repeat_literal, action)
+
+    if type(repeated) is RegexParser:
+        matches = repeated.matches
+
+        def repeat_regex(tokens, position=0):
+            # the action of the regex must be applied to each token: use the general case
+            if repeated._act is not identity:
+                return do_parse(tokens, position)
+            start   = position
+            end     = end_of_scan(tokens, start)
+            results = []
+            while position < end:
+                token = tokens[position]
+                if not matches(token):
+                    break
+                results.append(token)
+                position += 1
+            return outcome(start, position, results)
+        return Parser(repeat_regex, action)
 
     return Parser(do_parse, action)
 
@@ -465,10 +810,10 @@ def optional(rule, action=identity):
     :param action: the action to be applied on the result
     :return: a parser that recognises `rule` 0 or one time.
     """
-    rule = parser(rule) if not isinstance(rule, Parser) else rule
+    rule = _as_parser(rule)
     def do_parse(tokens, position=0):
-        result = rule(tokens, position)
-        return result if result.success() else Success(position, None)
+        result = rule._parse(tokens, position)
+        return result if result[0] else (True, position, None)
 
     return Parser(do_parse, action)
 
@@ -498,57 +843,94 @@ def list_of(rule, sep=",", action=identity):
     :param sep: the rule describing the separation between items
     :param action: the action to be applied on the parsed list of elements
     """
+    rule = _as_parser(rule)
+    sep  = _as_parser(sep)
+
     def do_parse(tokens, position=0):
-        leading = repeat( sequence( rule, sep, action=lambda x,_: x) )
-        the_pars= leading.then(rule, action=lambda x, y: x+[y])
-        return the_pars(tokens, position)
+        # This is `repeat(sequence(rule, sep)).then(rule)` in one single loop
+        items = []
+        while True:
+            success, position, value = rule._parse(tokens, position)
+            if not success:
+                return (False, position, value)
+            items.append(value)
+            success, reached, _ = sep._parse(tokens, position)
+            if not success:
+                return (True, position, items)
+            position = reached
     return Parser(do_parse, action)
 
+def packrat(rule, action=identity):
+    """
+    Generates a parser that memoizes the results of `rule` for each position of the token
+    stream. This is what turns the exponential backtracking of a recursive descent parser
+    into a (linear time) packrat parser.
+
+    :param rule: the rule whose results are to be memoized
+    :param action: the action to be applied on the result
+    :return: a parser that recognises the same content as `rule` but parses it only once
+             per position.
+    """
+    rule = _as_parser(rule)
+    return PackratParser(rule, action)
+
 #===============================================================================
 #
 #===============================================================================
+_MISS = object() # marks the absence of a memoized result
+
 def memoize(fn):
     """
     Decorator that memoizes the results of the function calls.
     This is pretty useful if you intend to implement a packrat parser.
+
+    .. Note::
+        The decorated function is meant to be called with positional arguments only
+        (just like parsers are). The tuple of these arguments is used as is to find the
+        memoized result of a call.
     """
-    # Define the memoizing map if needed
-    if not hasattr(fn, "__memo"):
-        fn.__memo = {}
-    # Decorate the function
-    def memoized(*args, **kwargs):
-        key = (*args, *kwargs)
-        if not key in fn.__memo :
-            fn.__memo[key] = fn(*args, *kwargs)
-        return fn.__memo[key]
-    # Return the decorated function
-    return memoized
+    # The unbounded lru_cache is exactly a memo table, only its lookups are done in C
+    return functools.lru_cache(maxsize=None)(fn)
+
+class _LRMarker:
+    """
+    What `leftrec` memoizes for a call that is still being evaluated: the seed result to
+    hand out to recursive calls and whether such a recursive call (left recursion) happened.
+    """
+    __slots__ = ("result", "is_LR")
+
+    def __init__(self, result):
+        self.result = result
+        self.is_LR  = False
 
 def leftrec(fn):
     """
     Decorator that activates the packrat left recursion support for this function.
     .. Note::
         This implementation is based on the paper by Warth, Douglass and Millstein
+    .. Note::
+        The decorated function is meant to be called with positional arguments only
+        (just like parsers are).
     """
     # Define the memoizing map if needed
     if not hasattr(fn, "__memo"):
         fn.__memo = {}
+    memo = fn.__memo
     # Decorate the function
-    def memoized(*args, **kwargs):
-        key = (*args, *kwargs)
-        if not key in fn.__memo :
-            _marker        = Failure(-1, "Prevent infinite recursion")
-            _marker._is_LR = False
-            fn.__memo[key] = _marker
-
-            result = fn(*args, *kwargs)
+    def memoized(*args):
+        entry = memo.get(args, _MISS)
+        if entry is _MISS:
+            marker     = _LRMarker(Failure(-1, "Prevent infinite recursion"))
+            memo[args] = marker
+
+            result = fn(*args)
             # do we need to grow the seed from left to right ?
-            if hasattr(fn.__memo[key], '_is_LR') and fn.__memo[key]._is_LR:
+            if marker.is_LR:
                 # LR is detected -> we need to grow it out !
                 while True:
-                    pos            = result.position()
-                    fn.__memo[key] = result
-                    ans = fn(*args, *kwargs)
+                    pos           = result.position()
+                    marker.result = result
+                    ans = fn(*args)
                     # was it a failure (aka, is left recursion over ?)
                     if not ans.success():
                         break
@@ -556,12 +938,14 @@ def leftrec(fn):
                         break
                     # else the seed has grown
                     result = ans
-            fn.__memo[key] = result
-        elif hasattr(fn.__memo[key], '_is_LR'):
+            memo[args] = result
+            return result
+        if type(entry) is _LRMarker:
             # this is a case of left recursion
-            fn.__memo[key]._is_LR = True
+            entry.is_LR = True
+            return entry.result
         # anyway: when it is over, just return the parsed value !
-        return fn.__memo[key]
+        return entry
     # Return the decorated function
     return memoized
 
@@ -569,6 +953,17 @@ def parser(fn):
     """Wraps a function to make it a parser (useful to implement recursive call)"""
     return Parser(fn)
 
+def _as_parser(rule):
+    """
+    Turns the given rule into a parser (if it isn't one already).
+    :param rule: either a parser, a text to be recognized or a function to be wrapped.
+    """
+    if isinstance(rule, Parser):
+        return rule
+    if isinstance(rule, str):
+        return text(rule)
+    return parser(rule)
+
 def parse_all(text, axiom, tokenizer=Tokenizer()):
     """
     Utility function to parse *all* the text of the given input text
@@ -578,13 +973,14 @@ def parse_all(text, axiom, tokenizer=Tokenizer()):
     :return: the value corresponding to a successful parse of the text
     :raises: an exception if not all text could be parsed
     """
-    axiom        = axiom if isinstance(axiom, Parser) else parser(axiom)
+    axiom        = _as_parser(axiom)
     tokens       = TokenStream( tokenizer, text )
-    parse_result = axiom(tokens)
+    # no need to wrap the outcome in a ParseResult, it is only used right here
+    success, position, value = axiom._parse(tokens)
     # Check possible failures
-    if not parse_result.success():
-        raise SyntaxError("At {} : {}".format(parse_result.position(), parse_result.reason()))
-    if not parse_result.position() == len(tokens):
-        raise SyntaxError("At {} : Invalid suffix".format(parse_result.position()))
+    if not success:
+        raise SyntaxError("At {} : {}".format(position, value))
+    if not position == len(tokens):
+        raise SyntaxError("At {} : Invalid suffix".format(position))
     # Ok we're good, return the result
-    return parse_result.value()
+    return value
@@ -60,6 +60,52 @@ class TestParsers(unittest.TestCase):
                          str(Failure(0, "Expecting one of the following tokens " \
                                        +"('HELLO', 'GuttenTag', 'GoeieMorgen')")))
     
+    def test_one_of_accepts_values_that_are_not_strings(self):
+        parse_txt = one_of(1, 2)
+        self.assertEqual(parse_txt([1]), Success(1, 1))
+    
+    def test_one_of_accepts_unhashable_values(self):
+        parse_txt = one_of([1], [2])
+        self.assertEqual(parse_txt([[2]]), Success(1, [2]))
+    
+    def test_one_of_accepts_unhashable_tokens(self):
+        parse_txt = one_of("GO", "BANG")
+        self.assertFalse(parse_txt([["GO"]]).success())
+    
+    # Test `dispatch`
+    def test_dispatch_should_apply_the_rule_selected_by_the_current_token(self):
+        parse_txt = dispatch({ "Hello":   sequence("Hello", "world"),
+                               "Bonjour": sequence("Bonjour", "tout") })
+        self.assertEqual(str(parse_txt(self.tokens)), str(Success(2, ("Bonjour", "tout"))))
+    
+    def test_dispatch_should_fail_when_the_selected_rule_fails(self):
+        parse_txt = dispatch({ "Bonjour": sequence("Bonjour", "les") })
+        self.assertEqual(str(parse_txt(self.tokens)), str(Failure(1, "Expected les instead of tout")))
+    
+    def test_dispatch_should_apply_the_default_rule_when_the_token_is_unknown(self):
+        parse_txt = dispatch({ "Hello": "Hello" }, default=regex(r"\w+"))
+        self.assertEqual(parse_txt(self.tokens), Success(1, "Bonjour"))
+    
+    def test_dispatch_not_accepted(self):
+        parse_txt = dispatch({ "Hello": "Hello", "GuttenTag": "GuttenTag" })
+        self.assertEqual(
+            str(parse_txt(self.tokens)), 
+            str(Failure(0, "Expecting one of the following tokens ('Hello', 'GuttenTag')")))
+    
+    def test_dispatch_accepts_keys_that_are_not_strings(self):
+        parse_txt = dispatch({ 1: one_of(1, 2) })
+        self.assertEqual(parse_txt([1]), Success(1, 1))
+    
+    def test_dispatch_accepts_unhashable_tokens(self):
+        parse_txt = dispatch({ "GO": "GO" })
+        self.assertFalse(parse_txt([["GO"]]).success())
+        parse_txt = dispatch({ "GO": "GO" }, default=one_of(["GO"]))
+        self.assertEqual(parse_txt([["GO"]]), Success(1, ["GO"]))
+    
+    def test_dispatch_applies_action_upon_success(self):
+        parse_txt = dispatch({ "Bonjour": "Bonjour" }, action=lambda x: x.lower())
+        self.assertEqual(parse_txt(self.tokens), Success(1, "bonjour"))
+    
     # Test `regex`
     def test_regex_should_succeed_when_token_matches_pattern_and_no_action_is_given(self):
         parse_txt = regex(r"\w+")
@@ -75,6 +121,12 @@ class TestParsers(unittest.TestCase):
             str(parse_txt(self.tokens)), 
             str(Failure(0, "Expecting a token matching \d+")))
     
+    def test_regex_must_match_the_whole_token_even_with_alternatives(self):
+        parse_txt = regex(r"Bon|Hello")
+        self.assertFalse(parse_txt(self.tokens).success())
+        self.assertFalse(parse_txt(["Hello\n"]).success())
+        self.assertEqual(parse_txt(["Hello"]), Success(1, "Hello"))
+    
     # Test `sequence`
     def test_sequence_should_succeed_when_all_tokens_appear_in_order__no_action(self):
         parse_txt = sequence("Bonjour", "tout", "le", "monde")
@@ -108,6 +160,28 @@ class TestParsers(unittest.TestCase):
             str(parse_txt(self.tokens)), 
             str(Failure(1, "Expected les instead of tout")))
     
+    def test_sequence_should_reject_when_tokens_run_out_before_the_end_of_the_sequence(self):
+        parse_txt = sequence("Bonjour", "tout", "le", "monde", "entier")
+        self.assertEqual(
+            str(parse_txt(self.tokens)), 
+            str(Failure(4, "Reached end of token stream")))
+    
+    def test_sequence_of_text_should_not_require_a_sliceable_token_stream(self):
+        class Stream:
+            def __init__(self, tokens):
+                self._tokens = tokens
+            def __len__(self):
+                return len(self._tokens)
+            def __getitem__(self, position):
+                if not isinstance(position, int):
+                    raise TypeError("positions must be integers")
+                return self._tokens[position]
+        
+        parse_txt = sequence("Bonjour", "tout")
+        self.assertEqual(
+            str(parse_txt(Stream(self.tokens))), 
+            str(Success(2, ("Bonjour", "tout"))))
+    
     # Test `optional`
     def test_optional_should_succeed_when_text_corresponds__no_action(self):
         parse_txt = optional("Bonjour")
@@ -153,6 +227,38 @@ class TestParsers(unittest.TestCase):
             str(Success(3, tokens))
         )
     
+    def test_repeat_should_apply_the_action_of_the_repeated_regex(self):
+        tokens    = ['GO', 'GO', 'GO']
+        parse_txt = repeat(regex(r'\w+', action=lambda x: x.lower()))
+        self.assertEqual(
+            str(parse_txt(tokens)),
+            str(Success(3, ['go', 'go', 'go']))
+        )
+    
+    def test_repeat_of_regex_should_not_require_a_sliceable_token_stream(self):
+        class Stream:
+            def __init__(self, tokens):
+                self._tokens = tokens
+            def __len__(self):
+                return len(self._tokens)
+            def __getitem__(self, position):
+                if not isinstance(position, int):
+                    raise TypeError("positions must be integers")
+                return self._tokens[position]
+        
+        parse_txt = repeat(regex(r'\w+'))
+        self.assertEqual(
+            str(parse_txt(Stream(['GO', 'GO']))),
+            str(Success(2, ['GO', 'GO']))
+        )
+    
+    def test_repeat_at_most_xtimes_should_reject_too_many_regex_matches(self):
+        tokens    = ['GO', 'GO', 'GO']
+        parse_txt = repeat(regex(r'\w+'), max_occurs=1)
+        result    = parse_txt(tokens) 
+        self.assertFalse(result.success())
+        self.assertEqual(2, result.position())
+    
     def test_repeat_should_succeed_even_when_there_are_no_occurrence_to_be_parsed__no_action(self):
         parse_txt = repeat('GO')
         self.assertEqual(
@@ -209,6 +315,14 @@ class TestParsers(unittest.TestCase):
         self.assertFalse(result.success())
         self.assertEqual(2, result.position())
     
+    def test_repeat_at_most_xtimes_should_stop_at_the_first_extra_match(self):
+        # reject as soon as there is one match too many
+        tokens    = ['GO', 'GO', 'GO', 'GO', 'GO']
+        parse_txt = repeat('GO', max_occurs=1)
+        result    = parse_txt(tokens) 
+        self.assertFalse(result.success())
+        self.assertEqual(2, result.position())
+    
     def test_repeat_exactly_xtimes_should_accept_when_there_is_the_right_number_of_matches(self):
         # accept when exactly the number
         tokens    = ['GO', 'GO', 'GO']
@@ -294,6 +408,67 @@ class TestParsers(unittest.TestCase):
             str(Success(5, 'go-go-go'))
         )
     
+    # Test `packrat`
+    def test_packrat_should_succeed_just_like_the_memoized_rule(self):
+        parse_txt = packrat(sequence("Bonjour", "tout"))
+        self.assertEqual(
+            str(parse_txt(self.tokens)),
+            str(Success(2, ("Bonjour", "tout"))))
+    
+    def test_packrat_should_fail_just_like_the_memoized_rule(self):
+        parse_txt = packrat("HELLO")
+        self.assertEqual(parse_txt(self.tokens), Failure(0, "Expected HELLO instead of Bonjour"))
+    
+    def test_packrat_applies_action_upon_success(self):
+        parse_txt = packrat("Bonjour", action=lambda x: x.lower())
+        self.assertEqual(parse_txt(self.tokens), Success(1, "bonjour"))
+    
+    def test_packrat_parses_each_position_only_once(self):
+        calls = 0
+        def counted(tokens, position=0):
+            nonlocal calls
+            calls += 1
+            return text("Bonjour")(tokens, position)
+        
+        parse_txt = packrat(counted)
+        tried     = sequence(parse_txt, "HELLO") | sequence(parse_txt, "tout")
+        result    = tried(self.tokens)
+        self.assertEqual(str(result), str(Success(2, ("Bonjour", "tout"))))
+        self.assertEqual(calls, 1)
+    
+    def test_packrat_combined_with_then_parses_each_position_only_once(self):
+        calls = 0
+        def counted(tokens, position=0):
+            nonlocal calls
+            calls += 1
+            return text("Bonjour")(tokens, position)
+        
+        parse_txt = packrat(counted)
+        tried     = (parse_txt + "HELLO") | parse_txt.then("tout")
+        result    = tried(self.tokens)
+        self.assertEqual(str(result), str(Success(2, ("Bonjour", "tout"))))
+        self.assertEqual(calls, 1)
+    
+    def test_packrat_forgets_results_when_stream_changes(self):
+        parse_txt = packrat("GO")
+        self.assertTrue (parse_txt(['GO']).success())
+        self.assertFalse(parse_txt(['BANG']).success())
+    
+    def test_packrat_never_pairs_a_stream_with_the_memo_of_an_other_one(self):
+        parse_txt = packrat(regex(r"\d+"))
+        other     = ["1"]
+        class Stream(list):
+            interrupted = False
+            def __len__(self):
+                # an other parse happens (ie. in an other thread) while this one starts
+                if not Stream.interrupted:
+                    Stream.interrupted = True
+                    parse_txt(other)
+                return list.__len__(self)
+        
+        self.assertEqual(parse_txt(Stream(["2"])), Success(1, "2"))
+        self.assertEqual(parse_txt(other), Success(1, "1"))
+    
     # Test combinator then
     def test_combinator_then_must_reject_when_first_token_doesnt_match(self):
         # reject when first does not match
@@ -472,6 +647,67 @@ class TestParsers(unittest.TestCase):
             str(result),
             str(Success(1, "go")))
         
+    def test_operator_PIPE_should_accept_when_token_matches_last_of_many_alternatives(self):
+        parse_txt = text("BANG") | "BOOM" | "WOW" | "GO"
+        result    = parse_txt(['GO', 'GO', '!'])
+        self.assertEqual(
+            str(result),
+            str(Success(1, 'GO')))
+    
+    def test_operator_PIPE_must_reject_with_last_failure_when_none_of_many_alternatives_match(self):
+        parse_txt = text("BANG") | "BOOM" | "WOW"
+        result    = parse_txt(['GO', 'GO', '!'])
+        self.assertEqual(
+            str(result),
+            str(Failure(0, "Expected WOW instead of GO")))
+    
+    def test_operator_PIPE_should_keep_the_action_of_a_nested_alternative(self):
+        nested    = text("BANG") | "GO"
+        nested.action(lambda x: x.lower())
+        parse_txt = nested | "WOW"
+        result    = parse_txt(['GO', 'GO', '!'])
+        self.assertEqual(
+            str(result),
+            str(Success(1, 'go')))
+    
+    def test_operator_PIPE_should_apply_an_action_given_to_a_nested_alternative_later_on(self):
+        nested    = text("A") | "B"
+        parse_txt = nested | "C"
+        nested.action(lambda x: x.lower())
+        self.assertEqual(parse_txt(["A"]), Success(1, "a"))
+        self.assertEqual(parse_txt(["C"]), Success(1, "C"))
+    
+    def test_operator_PIPE_should_apply_actions_given_later_to_deeply_nested_alternatives(self):
+        inner     = regex("A") | "B"
+        middle    = inner | "C"
+        parse_txt = middle | "D"
+        inner.action(lambda x: x.lower())
+        middle.action(lambda x: x + "!")
+        self.assertEqual(parse_txt(["A"]), Success(1, "a!"))
+        self.assertEqual(parse_txt(["C"]), Success(1, "C!"))
+        self.assertEqual(parse_txt(["D"]), Success(1, "D"))
+    
+    def test_operator_PIPE_should_apply_the_action_of_the_matching_keyword(self):
+        parse_txt = text("BANG") | text("GO", action=lambda x: x.lower()) | "WOW"
+        result    = parse_txt(['GO', 'GO', '!'])
+        self.assertEqual(
+            str(result),
+            str(Success(1, 'go')))
+    
+    def test_choice_without_alternatives_is_rejected(self):
+        self.assertRaises(ValueError, lambda: ChoiceParser([]))
+    
+    def test_operator_PIPE_should_accept_unhashable_keywords(self):
+        parse_txt = text([1]) | text([2])
+        self.assertEqual(parse_txt([[2]]), Success(1, [2]))
+    
+    def test_operator_PIPE_should_apply_the_first_of_identical_keywords(self):
+        parse_txt = text("GO") | text("GO", action=lambda x: x.lower())
+        result    = parse_txt(['GO', 'GO', '!'])
+        self.assertEqual(
+            str(result),
+            str(Success(1, 'GO')))
+        
     # Test change action
     def test_an_action_can_be_set_to_an_existing_parser(self):
         action    = lambda x: x.lower()
@@ -4,7 +4,9 @@ functions of the pyparsers module.
 
 Author: X. Gillard
 '''
+import gc
 import unittest
+import weakref
 from pyparsers import *
 
 class TestParsingUtils(unittest.TestCase):
@@ -43,6 +45,28 @@ class TestParsingUtils(unittest.TestCase):
         self.assertEqual(u, 10)
         self.assertEqual(secret, 10)
         
+    # test parser
+    def test_parser_does_not_share_its_action_with_other_users_of_the_function(self):
+        def rule(tokens, position=0):
+            return text("a")(tokens, position)
+        
+        seq     = sequence(rule, "x")
+        wrapper = parser(rule)
+        wrapper.action(lambda x: "CHANGED")
+        self.assertEqual(seq(["a", "x"]), Success(2, ("a", "x")))
+        self.assertEqual(wrapper(["a"]), Success(1, "CHANGED"))
+    
+    def test_parser_does_not_keep_the_wrapped_method_owner_alive(self):
+        class Grammar:
+            def __init__(self):
+                self._axiom = sequence(parser(self.rule), "OK")
+            def rule(self, tokens, position=0):
+                return text("OK")(tokens, position)
+        
+        grammar = weakref.ref(Grammar())
+        gc.collect()
+        self.assertIsNone(grammar())
+        
     # test leftrec
     # test parse_all must support raw function as input param
     def test_leftrec_allows_the_definition_of_direct_left_recursive_grammar(self):
@@ -75,4 +99,18 @@ class TestParsingUtils(unittest.TestCase):
                 return parse_all(text, self.rule_1, Tokenizer(punctuation=","))
              
         result = Grammar().parse("OK, OK, OK") 
-        self.assertEqual(str(result), str( ('OK', ',', ('OK', ',', 'OK')) ))
\ No newline at end of file
+        self.assertEqual(str(result), str( ('OK', ',', ('OK', ',', 'OK')) ))
+    
+    # test parse_all
+    def test_parse_all_returns_the_value_of_a_successful_parse(self):
+        result = parse_all("OK , OK", list_of("OK"), Tokenizer(punctuation=","))
+        self.assertEqual(result, ["OK", "OK"])
+    
+    def test_parse_all_raises_a_syntax_error_explaining_the_failure(self):
+        with self.assertRaises(SyntaxError) as context:
+            parse_all("OK , OK OK", list_of("OK"), Tokenizer(punctuation=","))
+        self.assertEqual(str(context.exception), "At 3 : Invalid suffix")
+        
+        with self.assertRaises(SyntaxError) as context:
+            parse_all("KO", "OK")
+        self.assertEqual(str(context.exception), "At 0 : Expected OK instead of KO")
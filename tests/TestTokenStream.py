@@ -7,6 +7,8 @@ Note::
 
 Author: X. Gillard
 '''
+import copy
+import pickle
 import unittest
 
 from pyparsers import Tokenizer, TokenStream
@@ -65,6 +67,39 @@ class TestTokenStream(unittest.TestCase):
         self.assertTrue("Bonjour" not in self.stream)
         self.assertTrue("Monde" not in self.stream)
         
+    def test_contains_unhashable(self):
+        "Validates that the 'in' operator does not choke on values that cannot be hashed"
+        self.assertFalse(["Hello"] in self.stream)
+        self.assertTrue(["Hello"] not in self.stream)
+        
     def test_iter(self):
         "Validates that the iterator is consistent with that of the underlying array"
-        self.assertEqual([x for x in self.stream], self.tokens)
\ No newline at end of file
+        self.assertEqual([x for x in self.stream], self.tokens)
+        
+    def test_streams_are_compared_by_identity(self):
+        "Validates that two streams are only considered equal when they are the same object"
+        other = TokenStream(self.tokenizer, self.text)
+        self.assertEqual(self.stream, self.stream)
+        self.assertNotEqual(self.stream, other)
+        self.assertEqual(hash(self.stream), hash(self.stream))
+        
+    def test_streams_are_not_equal_to_a_tuple_of_their_tokens(self):
+        "Validates that equality stays consistent with the identity based hash"
+        tokens = tuple(self.stream)
+        self.assertFalse(self.stream == tokens)
+        self.assertFalse(tokens == self.stream)
+        self.assertTrue (self.stream != tokens)
+        self.assertTrue (tokens != self.stream)
+        
+    def test_streams_can_be_copied(self):
+        "Validates that a copy holds the same tokens (but is an other stream)"
+        other = copy.copy(self.stream)
+        self.assertIsInstance(other, TokenStream)
+        self.assertEqual(list(other), self.tokens)
+        self.assertNotEqual(other, self.stream)
+        
+    def test_streams_can_be_pickled(self):
+        "Validates that a stream survives a pickle round trip"
+        other = pickle.loads(pickle.dumps(self.stream))
+        self.assertIsInstance(other, TokenStream)
+        self.assertEqual(list(other), self.tokens)
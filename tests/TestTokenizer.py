@@ -3,6 +3,7 @@ This module contains the tests that validate the behavior of a pyparsers.Tokeniz
 
 Author: X. Gillard
 '''
+import sys
 import unittest
 
 from pyparsers import Tokenizer
@@ -65,3 +66,26 @@ class TestTokenizer(unittest.TestCase):
         tokens = tested.tokenize(text)
         self.assertEqual(tokens, ["aa", ",", "123", "bb", ".", "456", "cc", "-", "789", "dd", ".", "-", "00"])
         
+    
+    def test_punctuation_at_boundaries(self):
+        """
+        Validates the behavior when punctuation appears at the very beginning or end of a token,
+        or when several punctuation marks are adjacent.
+        
+        Note:: Punctuation must be kept in the tokens output
+        """
+        text   = "(aa+bb)) +cc+"
+        tested = Tokenizer().punctuation(r"\(", r"\)", r"\+")
+        tokens = tested.tokenize(text)
+        self.assertEqual(tokens, ["(", "aa", "+", "bb", ")", ")", "+", "cc", "+"])
+    
+    def test_tokens_are_interned(self):
+        """
+        Validates that the produced tokens are interned strings (so that comparing them with the
+        literals of a grammar boils down to an identity check)
+        """
+        text   = "".join(["aa", "-", "123"])
+        tested = Tokenizer().punctuation("-")
+        tokens = tested.tokenize(text)
+        for token in tokens:
+            self.assertIs(token, sys.intern(token))